@@ -1,124 +1,190 @@
+import argparse
 import sqlite3
-import pandas as pd
-
-df = pd.read_csv("Tesla_Data.csv")   
-
-
-conn = sqlite3.connect("ev_data.db")
-cursor = conn.cursor()
-
-
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS Date (
-    date_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    year INTEGER NOT NULL,
-    month_name TEXT NOT NULL
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS Region (
-    region_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    region_name TEXT NOT NULL
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS Model (
-    model_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    model_name TEXT NOT NULL
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS EVMetrics (
-    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    date_id INTEGER NOT NULL,
-    region_id INTEGER NOT NULL,
-    model_id INTEGER NOT NULL,
-    estimated_deliveries INTEGER,
-    production_units INTEGER,
-    avg_price_usd REAL,
-    battery_capacity_kwh INTEGER,
-    range_km INTEGER,
-    co2_saved_tons REAL,
-    charging_stations INTEGER,
-    FOREIGN KEY (date_id) REFERENCES Date(date_id),
-    FOREIGN KEY (region_id) REFERENCES Region(region_id),
-    FOREIGN KEY (model_id) REFERENCES Model(model_id)
-);
-""")
-
-conn.commit()
-
-
-
-def get_or_create_date(year, month_name):
+
+CSV_PATH = "Tesla_Data.csv"
+DB_PATH = "ev_data.db"
+
+
+def create_tables(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Date (
+        date_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        year INTEGER NOT NULL,
+        month_name TEXT NOT NULL
+    );
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Region (
+        region_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        region_name TEXT NOT NULL
+    );
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS Model (
+        model_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_name TEXT NOT NULL
+    );
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS EVMetrics (
+        metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date_id INTEGER NOT NULL,
+        region_id INTEGER NOT NULL,
+        model_id INTEGER NOT NULL,
+        estimated_deliveries INTEGER,
+        production_units INTEGER,
+        avg_price_usd REAL,
+        battery_capacity_kwh INTEGER,
+        range_km INTEGER,
+        co2_saved_tons REAL,
+        charging_stations INTEGER,
+        FOREIGN KEY (date_id) REFERENCES Date(date_id),
+        FOREIGN KEY (region_id) REFERENCES Region(region_id),
+        FOREIGN KEY (model_id) REFERENCES Model(model_id)
+    );
+    """)
+    cursor.connection.commit()
+
+
+def get_or_create_date(cursor, year, month_name):
     cursor.execute("SELECT date_id FROM Date WHERE year=? AND month_name=?", (year, month_name))
     result = cursor.fetchone()
     if result:
         return result[0]
     
     cursor.execute("INSERT INTO Date (year, month_name) VALUES (?, ?)", (year, month_name))
-    conn.commit()
+    cursor.connection.commit()
     return cursor.lastrowid
 
 
-def get_or_create_region(region_name):
+def get_or_create_region(cursor, region_name):
     cursor.execute("SELECT region_id FROM Region WHERE region_name=?", (region_name,))
     result = cursor.fetchone()
     if result:
         return result[0]
     
     cursor.execute("INSERT INTO Region (region_name) VALUES (?)", (region_name,))
-    conn.commit()
+    cursor.connection.commit()
     return cursor.lastrowid
 
 
-def get_or_create_model(model_name):
+def get_or_create_model(cursor, model_name):
     cursor.execute("SELECT model_id FROM Model WHERE model_name=?", (model_name,))
     result = cursor.fetchone()
     if result:
         return result[0]
     
     cursor.execute("INSERT INTO Model (model_name) VALUES (?)", (model_name,))
-    conn.commit()
+    cursor.connection.commit()
     return cursor.lastrowid
 
 
-
-
-for row in df.itertuples(index=False):
-    
-    # Insert or get dimension keys
-    date_id = get_or_create_date(row.Year, row.Month)
-    region_id = get_or_create_region(row.Region)
-    model_id = get_or_create_model(row.Model)
-
-    # Insert fact row
+def load_csv(cursor, csv_path=CSV_PATH):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+
+    for row in df.itertuples(index=False):
+
+        # Insert or get dimension keys
+        date_id = get_or_create_date(cursor, row.Year, row.Month)
+        region_id = get_or_create_region(cursor, row.Region)
+        model_id = get_or_create_model(cursor, row.Model)
+
+        # Insert fact row
+        cursor.execute("""
+            INSERT INTO EVMetrics (
+                date_id, region_id, model_id,
+                estimated_deliveries, production_units,
+                avg_price_usd, battery_capacity_kwh, range_km,
+                co2_saved_tons, charging_stations
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            date_id,
+            region_id,
+            model_id,
+            int(row.Estimated_Deliveries),
+            int(row.Production_Units),
+            float(row.Avg_Price_USD),
+            int(row.Battery_Capacity_kWh),
+            int(row.Range_km),
+            float(row.CO2_Saved_tons),
+            int(row.Charging_Stations)
+        ))
+
+    cursor.connection.commit()
+
+
+# Stratified sample of the fact table (per year x region x model) used by the
+# dashboard's approximate mode. Each stratum keeps SAMPLE_FRACTION of its rows,
+# but never fewer than SAMPLE_MIN_ROWS (or the whole stratum if it is smaller).
+SAMPLE_FRACTION = 0.01
+SAMPLE_MIN_ROWS = 30
+
+
+def build_sample_tables(cursor, fraction=SAMPLE_FRACTION, min_rows=SAMPLE_MIN_ROWS):
+    cursor.execute("DROP TABLE IF EXISTS EVMetricsSample")
     cursor.execute("""
-        INSERT INTO EVMetrics (
-            date_id, region_id, model_id,
+        CREATE TABLE EVMetricsSample AS
+        SELECT
+            metric_id, date_id, region_id, model_id, year,
             estimated_deliveries, production_units,
             avg_price_usd, battery_capacity_kwh, range_km,
-            co2_saved_tons, charging_stations
+            co2_saved_tons, charging_stations,
+            stratum_size, sample_size
+        FROM (
+            SELECT
+                f.*,
+                d.year,
+                ROW_NUMBER() OVER (stratum ORDER BY RANDOM()) AS stratum_rank,
+                COUNT(*) OVER stratum AS stratum_size,
+                MIN(COUNT(*) OVER stratum, MAX(?, CAST(COUNT(*) OVER stratum * ? AS INTEGER))) AS sample_size
+            FROM EVMetrics f
+            JOIN Date d ON f.date_id = d.date_id
+            WINDOW stratum AS (PARTITION BY d.year, f.region_id, f.model_id)
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        date_id,
-        region_id,
-        model_id,
-        int(row.Estimated_Deliveries),
-        int(row.Production_Units),
-        float(row.Avg_Price_USD),
-        int(row.Battery_Capacity_kWh),
-        int(row.Range_km),
-        float(row.CO2_Saved_tons),
-        int(row.Charging_Stations)
-    ))
-
-conn.commit()
-conn.close()
-
-print("Database successfully populated using Pandas DataFrame!")
+        WHERE stratum_rank <= sample_size
+    """, (min_rows, fraction))
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sample_stratum
+        ON EVMetricsSample (year, region_id, model_id)
+    """)
+    cursor.connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate ev_data.db from Tesla_Data.csv")
+    parser.add_argument("--samples", action="store_true",
+                        help="only rebuild the EVMetricsSample table from the existing fact rows")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    create_tables(cursor)
+
+    if args.samples:
+        build_sample_tables(cursor)
+        conn.close()
+        print("Sample tables rebuilt.")
+        return
+
+    # Loading appends every CSV row, so never load into a populated table.
+    fact_rows = cursor.execute("SELECT COUNT(*) FROM EVMetrics").fetchone()[0]
+    if fact_rows:
+        print(f"EVMetrics already has {fact_rows:,} rows; skipping the CSV load "
+              f"(delete {DB_PATH} to reload it).")
+    else:
+        load_csv(cursor)
+        print("Database successfully populated using Pandas DataFrame!")
+    build_sample_tables(cursor)
+    conn.close()
+
+    print("Sample tables rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+
+import streamlit as st
+
+
+# Figures are cached as built go.Figure objects keyed by a fingerprint of the
+# input data plus the chart parameters, so reruns triggered by unrelated
+# widgets reuse the figure instead of rebuilding it. They are shared through
+# st.cache_resource rather than copied out of st.cache_data: handing
+# st.plotly_chart a Figure skips the re-validation it does for a dict spec.
+# Serialization is not avoided: st.plotly_chart still runs fig.to_dict() and
+# plotly.io.to_json on every rerun, so a cache hit saves figure construction
+# and validation but still pays the JSON encoding.
+# The cached figures are never mutated after they are built. Each figure
+# embeds a copy of its data, so the caches are bounded by FIGURE_CACHE_ENTRIES.
+# Plotly is imported inside the builders so it only loads on a cache miss.
+
+FIGURE_CACHE_ENTRIES = 64
+
+def data_fingerprint(df):
+    import pandas as pd
+
+    digest = hashlib.sha1()
+    digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _px_figure(kind, fingerprint, _df, params, xaxes, traces):
+    import plotly.express as px
+
+    fig = getattr(px, kind)(_df, **params)
+    if xaxes:
+        fig.update_xaxes(**xaxes)
+    if traces:
+        fig.update_traces(**traces)
+    return fig
+
+
+def px_chart(kind, df, xaxes=None, traces=None, **params):
+    return _px_figure(kind, data_fingerprint(df), df, params, xaxes, traces)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _gap_figure(fingerprint, _df):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=_df['date'],
+        y=_df['estimated_deliveries'],
+        name='Deliveries',
+        mode='lines+markers',
+        marker_color='red'
+    ))
+    fig.update_layout(
+        title='Production vs Delivery Gap Over Time',
+        xaxis_title='Year',
+        yaxis_title='Units',
+        hovermode='x unified'
+    )
+    fig.update_xaxes(
+        dtick="M12",
+        tickformat="%Y",
+        ticklabelmode="period"
+    )
+    return fig
+
+
+def gap_chart(df):
+    return _gap_figure(data_fingerprint(df), df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _growth_figure(fingerprint, _df):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=_df['month_name'],
+        y=_df['prod_growth'],
+        name='Production Growth',
+        mode='lines+markers'
+    ))
+    fig.add_trace(go.Scatter(
+        x=_df['month_name'],
+        y=_df['deliv_growth'],
+        name='Delivery Growth',
+        mode='lines+markers'
+    ))
+    fig.update_layout(
+        title='Month-over-Month Growth Rates (%)',
+        xaxis_title='Month',
+        yaxis_title='Growth Rate (%)',
+        hovermode='x unified'
+    )
+    return fig
+
+
+def growth_chart(df):
+    return _growth_figure(data_fingerprint(df), df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _trend_figure(fingerprint, _df):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=_df['year'],
+        y=_df['total_deliveries'],
+        name='Total Deliveries',
+        yaxis='y',
+        marker_color='lightblue'
+    ))
+    fig.add_trace(go.Scatter(
+        x=_df['year'],
+        y=_df['avg_price'],
+        name='Average Price',
+        yaxis='y2',
+        mode='lines+markers',
+        marker_color='red'
+    ))
+    fig.update_layout(
+        title='Tesla Sales Growth Over Time',
+        xaxis_title='Year',
+        yaxis=dict(title='Total Deliveries', side='left'),
+        yaxis2=dict(title='Average Price (USD)', side='right', overlaying='y'),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def trend_chart(df):
+    return _trend_figure(data_fingerprint(df), df)
+
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def _pivot_table(fingerprint, _df, index, columns, values):
+    return _df.pivot(index=index, columns=columns, values=values)
+
+
+def pivot_table(df, index, columns, values, fmt):
+    pivot = _pivot_table(data_fingerprint(df), df, index, columns, values)
+    return pivot.style.format(fmt)
@@ -1,28 +1,29 @@
+import os
+import tempfile
 import streamlit as st
-import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import charts
+from queries import run_query, cache_memory, QUERY_CACHE_BYTES, has_sample, approximate_query, refine_in_background, refinements_done
+from fact_rows import export_fact_rows, parquet_available
 st.set_page_config(layout="wide", page_title="Tesla Production and Delivery Analytics")
 
-DB_PATH = "ev_data.db"
-
 
 MONTH_ORDER = {
     'January': 1, 'February': 2, 'March': 3, 'April': 4,
     'May': 5, 'June': 6, 'July': 7, 'August': 8,
     'September': 9, 'October': 10, 'November': 11, 'December': 12}
 
-@st.cache_data
-def run_query(query):
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
-    except Exception as e:
-        st.error(f"Database error: {e}")
-        return None
+
+def run_query_or_estimate(query, measures, group_by, where):
+    # In approximate mode, answer from the stratified sample until the exact
+    # result has been computed in the background.
+    if not approximate_mode:
+        return run_query(query), False
+    df = refine_in_background(query)
+    if df is not None:
+        return df, False
+    st.session_state["estimated_queries"].append(query)
+    return approximate_query(measures, group_by, where), True
+
 
 st.title("⚡ Tesla Production & Delivery Analytics Dashboard")
 st.markdown("**Team 6: Object Oriented Leaders (OOLs)**")
@@ -47,8 +48,23 @@ selected_regions = st.sidebar.multiselect(
     "Select Region(s):",
     options=region_options,
     default=["North America"])
+
+# Exact queries whose estimates this run put on screen; the refinement
+# watcher below reruns the app once all of them have finished.
+st.session_state["estimated_queries"] = []
+
+approximate_mode = st.sidebar.toggle(
+    "Approximate mode",
+    value=False,
+    disabled=not has_sample(),
+    help="Answer from a stratified sample with 95% confidence intervals, then refine to exact results."
+         if has_sample() else "Sample tables not built yet; run `python Database.py --samples` to enable.")
 st.sidebar.divider()
 
+# Imported after the title and filters have been sent so a cold start paints
+# them before pandas has finished loading.
+import pandas as pd
+
 st.header("📊 Key Performance Metrics")
 
 if selected_years and selected_models and selected_regions:
@@ -70,27 +86,45 @@ if selected_years and selected_models and selected_regions:
         regions=",".join([f"'{r}'" for r in selected_regions])
     )
     
-    df_metrics = run_query(metrics_query)
+    df_metrics, metrics_approximate = run_query_or_estimate(
+        metrics_query,
+        (("total_production", "sum", "f.production_units"),
+         ("total_deliveries", "sum", "f.estimated_deliveries"),
+         ("avg_price", "avg", "f.avg_price_usd")),
+        (),
+        "d.year IN ({years}) AND m.model_name IN ({models}) AND r.region_name IN ({regions})".format(
+            years=",".join(map(str, selected_years)),
+            models=",".join([f"'{m}'" for m in selected_models]),
+            regions=",".join([f"'{r}'" for r in selected_regions])
+        )
+    )
+    prefix = "≈ " if metrics_approximate else ""
     col1, col2, col3 = st.columns(3)
     
     with col1:
         if df_metrics is not None and not df_metrics.empty:
             total_prod = df_metrics['total_production'].iloc[0]
-            st.metric(label="Total Production", value=f"{total_prod:,.0f}" if pd.notna(total_prod) else "N/A")
+            st.metric(label="Total Production", value=f"{prefix}{total_prod:,.0f}" if pd.notna(total_prod) else "N/A")
+            if metrics_approximate:
+                st.caption(f"±{df_metrics['total_production_ci'].iloc[0]:,.0f} (95% CI)")
         else:
             st.metric(label="Total Production", value="No Data")
     
     with col2:
         if df_metrics is not None and not df_metrics.empty:
             total_deliv = df_metrics['total_deliveries'].iloc[0]
-            st.metric(label="Total Deliveries", value=f"{total_deliv:,.0f}" if pd.notna(total_deliv) else "N/A")
+            st.metric(label="Total Deliveries", value=f"{prefix}{total_deliv:,.0f}" if pd.notna(total_deliv) else "N/A")
+            if metrics_approximate:
+                st.caption(f"±{df_metrics['total_deliveries_ci'].iloc[0]:,.0f} (95% CI)")
         else:
             st.metric(label="Total Deliveries", value="No Data")
     
     with col3:
         if df_metrics is not None and not df_metrics.empty:
             avg_price = df_metrics['avg_price'].iloc[0]
-            st.metric(label="Avg Price (USD)", value=f"${avg_price:,.2f}" if pd.notna(avg_price) else "N/A")
+            st.metric(label="Avg Price (USD)", value=f"{prefix}${avg_price:,.2f}" if pd.notna(avg_price) else "N/A")
+            if metrics_approximate:
+                st.caption(f"±${df_metrics['avg_price_ci'].iloc[0]:,.2f} (95% CI)")
         else:
             st.metric(label="Avg Price (USD)", value="No Data")
 else:
@@ -135,27 +169,27 @@ with tab1:
         df_volatility = run_query(volatility_query)
         
         if df_volatility is not None and not df_volatility.empty:
-            df_volatility['month_order'] = df_volatility['month_name'].map(MONTH_ORDER)
+            df_volatility['month_order'] = df_volatility['month_name'].map(MONTH_ORDER).astype(int)
             df_volatility = df_volatility.sort_values(['model_name', 'year', 'month_order'])
-            df_volatility['prev_production'] = df_volatility.groupby('model_name')['production_units'].shift(1)
+            df_volatility['prev_production'] = df_volatility.groupby('model_name', observed=True)['production_units'].shift(1)
             df_volatility['pct_change'] = ((df_volatility['production_units'] - df_volatility['prev_production']) 
                                             / df_volatility['prev_production'] * 100)
             
             df_volatility['date'] = pd.to_datetime(df_volatility['year'].astype(str) + '-' + df_volatility['month_order'].astype(str) + '-01')
 
-            fig_volatility = px.line(
+            fig_volatility = charts.px_chart(
+                'line',
                 df_volatility,
                 x='date',
                 y='pct_change',
                 color='model_name',
                 title='Annual Month-over-Month Production Volatility by Model (%)',
-                labels={'pct_change': 'Production Change (%)', 'date': 'Year'}
-            )
-
-            fig_volatility.update_xaxes(
-                dtick="M12",           # Show tick every 12 months (yearly)
-                tickformat="%Y",       # Display only the year
-                ticklabelmode="period" # Center year over its 12 months
+                labels={'pct_change': 'Production Change (%)', 'date': 'Year'},
+                xaxes=dict(
+                    dtick="M12",           # Show tick every 12 months (yearly)
+                    tickformat="%Y",       # Display only the year
+                    ticklabelmode="period" # Center year over its 12 months
+                )
             )
 
             st.plotly_chart(fig_volatility, use_container_width=True)
@@ -201,36 +235,12 @@ with tab1:
         df_gap = run_query(gap_query)
         
         if df_gap is not None and not df_gap.empty:
-            df_gap['month_order'] = df_gap['month_name'].map(MONTH_ORDER)
+            df_gap['month_order'] = df_gap['month_name'].map(MONTH_ORDER).astype(int)
             df_gap = df_gap.sort_values(['year', 'month_order'])
             
             df_gap['date'] = pd.to_datetime(df_gap['year'].astype(str) + '-' + df_gap['month_order'].astype(str) + '-01')
 
-            fig_gap = go.Figure()
-            
-
-            
-            fig_gap.add_trace(go.Scatter(
-                x=df_gap['date'],  # ← Change from 'month_name' to 'date'
-                y=df_gap['estimated_deliveries'],
-                name='Deliveries',
-                mode='lines+markers',
-                marker_color='red'
-            ))
-            
-            fig_gap.update_layout(
-                title='Production vs Delivery Gap Over Time',
-                xaxis_title='Year',
-                yaxis_title='Units',
-                hovermode='x unified'
-            )
-            
-            # Add this to format the x-axis like the volatility graph
-            fig_gap.update_xaxes(
-                dtick="M12",
-                tickformat="%Y",
-                ticklabelmode="period"
-            )
+            fig_gap = charts.gap_chart(df_gap)
             
             st.plotly_chart(fig_gap, use_container_width=True)
             
@@ -243,7 +253,7 @@ with tab1:
             """)
             
             st.write("### Key Insights:")
-            avg_gap = df_gap.groupby('model_name')['inventory_change'].mean().reset_index()
+            avg_gap = df_gap.groupby('model_name', observed=True)['inventory_change'].mean().reset_index()
             avg_gap.columns = ['Model', 'Average Inventory Change']
             st.dataframe(avg_gap, width='stretch')
             
@@ -272,17 +282,24 @@ with tab2:
         GROUP BY r.region_name, m.model_name, f.range_km
         """.format(years=",".join(map(str, selected_years)))
         
-        df_range = run_query(range_query)
+        df_range, range_approximate = run_query_or_estimate(
+            range_query,
+            (("total_deliveries", "sum", "f.estimated_deliveries"),),
+            ("r.region_name", "m.model_name", "f.range_km"),
+            "d.year IN ({years})".format(years=",".join(map(str, selected_years)))
+        )
         
         if df_range is not None and not df_range.empty:
-            fig_range = px.scatter(
+            fig_range = charts.px_chart(
+                'scatter',
                 df_range,
                 x='range_km',
                 y='total_deliveries',
                 color='region_name',
                 size='total_deliveries',
                 hover_data=['model_name'],
-                title='Deliveries vs Vehicle Range by Region',
+                error_y='total_deliveries_ci' if range_approximate else None,
+                title='Deliveries vs Vehicle Range by Region' + (' (approximate, 95% CI)' if range_approximate else ''),
                 labels={'range_km': 'Range (km)', 'total_deliveries': 'Total Deliveries'}
             )
             st.plotly_chart(fig_range, width='stretch')
@@ -319,7 +336,8 @@ with tab2:
         df_price = run_query(price_query)
         
         if df_price is not None and not df_price.empty:
-            fig_price = px.bar(
+            fig_price = charts.px_chart(
+                'bar',
                 df_price,
                 x='region_name',
                 y='avg_price',
@@ -337,9 +355,9 @@ with tab2:
             helps identify high-margin markets, and informs expansion strategies into underserved or premium markets.
             """)
             
-            pivot_price = df_price.pivot(index='model_name', columns='region_name', values='avg_price')
+            pivot_price = charts.pivot_table(df_price, 'model_name', 'region_name', 'avg_price', "${:,.2f}")
             st.write("### Price Comparison Table")
-            st.dataframe(pivot_price.style.format("${:,.2f}"), width='stretch')
+            st.dataframe(pivot_price, width='stretch')
             
             with st.expander("📊 View Raw Data"):
                 st.dataframe(df_price, width='stretch')
@@ -373,7 +391,7 @@ with tab3:
         df_growth = run_query(growth_query)
         
         if df_growth is not None and not df_growth.empty:
-            df_growth['month_order'] = df_growth['month_name'].map(MONTH_ORDER)
+            df_growth['month_order'] = df_growth['month_name'].map(MONTH_ORDER).astype(int)
             df_growth = df_growth.sort_values(['year', 'month_order'])
             
             df_growth['prev_production'] = df_growth['total_production'].shift(1)
@@ -383,26 +401,7 @@ with tab3:
             df_growth['deliv_growth'] = ((df_growth['total_deliveries'] - df_growth['prev_deliveries']) 
                                           / df_growth['prev_deliveries'] * 100)
             
-            fig_growth = go.Figure()
-            fig_growth.add_trace(go.Scatter(
-                x=df_growth['month_name'],
-                y=df_growth['prod_growth'],
-                name='Production Growth',
-                mode='lines+markers'
-            ))
-            fig_growth.add_trace(go.Scatter(
-                x=df_growth['month_name'],
-                y=df_growth['deliv_growth'],
-                name='Delivery Growth',
-                mode='lines+markers'
-            ))
-            
-            fig_growth.update_layout(
-                title='Month-over-Month Growth Rates (%)',
-                xaxis_title='Month',
-                yaxis_title='Growth Rate (%)',
-                hovermode='x unified'
-            )
+            fig_growth = charts.growth_chart(df_growth)
             st.plotly_chart(fig_growth, width='stretch')
             
             with st.expander("📊 View Raw Data"):
@@ -438,10 +437,11 @@ with tab3:
             df_seasonal = run_query(seasonal_query)
             
             if df_seasonal is not None and not df_seasonal.empty:
-                df_seasonal['month_order'] = df_seasonal['month_name'].map(MONTH_ORDER)
+                df_seasonal['month_order'] = df_seasonal['month_name'].map(MONTH_ORDER).astype(int)
                 df_seasonal = df_seasonal.sort_values('month_order')
                 
-                fig_seasonal = px.line(
+                fig_seasonal = charts.px_chart(
+                    'line',
                     df_seasonal,
                     x='month_name',
                     y='avg_production',
@@ -453,7 +453,8 @@ with tab3:
                 )
                 st.plotly_chart(fig_seasonal, width='stretch')
                 
-                fig_seasonal2 = px.line(
+                fig_seasonal2 = charts.px_chart(
+                    'line',
                     df_seasonal,
                     x='month_name',
                     y='avg_deliveries',
@@ -493,7 +494,8 @@ with tab4:
         df_regional_delivery = run_query(regional_delivery_query)
         
         if df_regional_delivery is not None and not df_regional_delivery.empty:
-            fig_regional = px.bar(
+            fig_regional = charts.px_chart(
+                'bar',
                 df_regional_delivery,
                 x='region_name',
                 y='total_deliveries',
@@ -504,9 +506,9 @@ with tab4:
             )
             st.plotly_chart(fig_regional, width='stretch')
             
-            pivot_regional = df_regional_delivery.pivot(index='model_name', columns='region_name', values='avg_deliveries')
+            pivot_regional = charts.pivot_table(df_regional_delivery, 'model_name', 'region_name', 'avg_deliveries', "{:,.0f}")
             st.write("### Average Deliveries by Region")
-            st.dataframe(pivot_regional.style.format("{:,.0f}"), width='stretch')
+            st.dataframe(pivot_regional, width='stretch')
             
             with st.expander("📊 View Raw Data"):
                 st.dataframe(df_regional_delivery, width='stretch')
@@ -529,24 +531,33 @@ with tab4:
         GROUP BY r.region_name
         """.format(years=",".join(map(str, selected_years)))
         
-        df_charging = run_query(charging_query)
+        df_charging, charging_approximate = run_query_or_estimate(
+            charging_query,
+            (("avg_charging_stations", "avg", "f.charging_stations"),
+             ("total_deliveries", "sum", "f.estimated_deliveries")),
+            ("r.region_name",),
+            "d.year IN ({years})".format(years=",".join(map(str, selected_years)))
+        )
         
         if df_charging is not None and not df_charging.empty:
-            fig_charging = px.scatter(
+            fig_charging = charts.px_chart(
+                'scatter',
                 df_charging,
                 x='avg_charging_stations',
                 y='total_deliveries',
                 text='region_name',
                 size='total_deliveries',
-                title='Charging Station Availability vs Deliveries',
+                error_x='avg_charging_stations_ci' if charging_approximate else None,
+                error_y='total_deliveries_ci' if charging_approximate else None,
+                title='Charging Station Availability vs Deliveries' + (' (approximate, 95% CI)' if charging_approximate else ''),
                 labels={'avg_charging_stations': 'Average Charging Stations', 
-                       'total_deliveries': 'Total Deliveries'}
+                       'total_deliveries': 'Total Deliveries'},
+                traces=dict(textposition='top center')
             )
-            fig_charging.update_traces(textposition='top center')
             st.plotly_chart(fig_charging, width='stretch')
             
             correlation = df_charging[['avg_charging_stations', 'total_deliveries']].corr().iloc[0, 1]
-            st.write(f"### Correlation: {correlation:.3f}")
+            st.write(f"### Correlation: {'≈ ' if charging_approximate else ''}{correlation:.3f}")
             
             with st.expander("📊 View Raw Data"):
                 st.dataframe(df_charging, width='stretch')
@@ -573,7 +584,8 @@ with tab5:
     df_infra = run_query(infra_corr_query)
     
     if df_infra is not None and not df_infra.empty:
-        fig_infra = px.scatter(
+        fig_infra = charts.px_chart(
+            'scatter',
             df_infra,
             x='avg_charging_stations',
             y='total_deliveries',
@@ -615,32 +627,7 @@ with tab5:
     df_trend = run_query(trend_query)
     
     if df_trend is not None and not df_trend.empty:
-        fig_trend = go.Figure()
-        
-        fig_trend.add_trace(go.Bar(
-            x=df_trend['year'],
-            y=df_trend['total_deliveries'],
-            name='Total Deliveries',
-            yaxis='y',
-            marker_color='lightblue'
-        ))
-        
-        fig_trend.add_trace(go.Scatter(
-            x=df_trend['year'],
-            y=df_trend['avg_price'],
-            name='Average Price',
-            yaxis='y2',
-            mode='lines+markers',
-            marker_color='red'
-        ))
-        
-        fig_trend.update_layout(
-            title='Tesla Sales Growth Over Time',
-            xaxis_title='Year',
-            yaxis=dict(title='Total Deliveries', side='left'),
-            yaxis2=dict(title='Average Price (USD)', side='right', overlaying='y'),
-            hovermode='x unified'
-        )
+        fig_trend = charts.trend_chart(df_trend)
         st.plotly_chart(fig_trend, width='stretch')
         
         if len(df_trend) > 1:
@@ -655,4 +642,52 @@ with tab5:
 
 st.divider()
 st.caption("_Dashboard developed by Team 6: Object Oriented Leaders (OOLs)_")
-st.caption("_Data Source: Tesla EA Deliveries and Production Data (2015-2025)_")
\ No newline at end of file
+st.caption("_Data Source: Tesla EA Deliveries and Production Data (2015-2025)_")
+
+if st.session_state["estimated_queries"]:
+    @st.fragment(run_every="1s")
+    def refinement_watcher():
+        # Swap in the exact results with a full rerun once they are ready.
+        if refinements_done(st.session_state["estimated_queries"]):
+            st.rerun()
+        st.caption("⏳ Refining approximate results in the background…")
+
+    refinement_watcher()
+
+st.sidebar.subheader("Export")
+export_formats = ["csv", "parquet"] if parquet_available() else ["csv"]
+export_format = st.sidebar.selectbox("Format:", export_formats)
+
+# One scratch directory per session. TemporaryDirectory deletes itself when
+# it is garbage collected, i.e. once the session (and its state) is gone.
+if "export_dir" not in st.session_state:
+    st.session_state["export_dir"] = tempfile.TemporaryDirectory(prefix="ev_export_")
+export_dir = st.session_state["export_dir"].name
+
+
+def export_filtered_rows(directory=export_dir, fmt=export_format,
+                         years=tuple(selected_years), models=tuple(selected_models), regions=tuple(selected_regions)):
+    # Runs on Streamlit's download thread only when the button is clicked, so
+    # reruns never re-read or re-register the file. Each click writes its own
+    # file so concurrent clicks never share a path, and the file is removed
+    # once its bytes have been read.
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=directory)
+    os.close(fd)
+    try:
+        export_fact_rows(path, fmt, years, models, regions)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+st.sidebar.download_button(
+    "Export filtered rows",
+    data=export_filtered_rows,
+    file_name=f"ev_metrics.{export_format}",
+    mime="text/csv" if export_format == "csv" else "application/octet-stream",
+    disabled=not (selected_years and selected_models and selected_regions))
+
+cached_results, cached_bytes = cache_memory()
+st.sidebar.caption(f"Query cache: {cached_results} results, "
+                   f"{cached_bytes / 1024 ** 2:,.2f} of {QUERY_CACHE_BYTES / 1024 ** 2:,.0f} MB")
\ No newline at end of file
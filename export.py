@@ -0,0 +1,47 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+import fact_rows
+
+# Streams the fact rows matching a year/model/region filter to CSV or Parquet
+# using the same export code as the dashboard. Omitted filters match everything.
+#
+#   python export.py ev_2024.parquet --years 2024 --models "Model S" "Model 3"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export filtered EV fact rows to CSV or Parquet")
+    parser.add_argument("output", help="file to write; the format is taken from its extension unless --format is given")
+    parser.add_argument("--years", type=int, nargs="+")
+    parser.add_argument("--models", nargs="+")
+    parser.add_argument("--regions", nargs="+")
+    parser.add_argument("--format", choices=fact_rows.EXPORT_FORMATS)
+    parser.add_argument("--db", help="database to read (defaults to EV_DB_PATH or ev_data.db)")
+    parser.add_argument("--chunk-size", type=int, default=fact_rows.EXPORT_CHUNK_ROWS, help="rows fetched and written per chunk")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in fact_rows.EXPORT_FORMATS:
+        parser.error("cannot infer the format from the output name; pass --format csv or --format parquet")
+
+    db_path = args.db or fact_rows.DB_PATH
+    if not os.path.isfile(db_path):
+        parser.error(f"database not found: {db_path}")
+
+    if fmt == "parquet" and not fact_rows.parquet_available():
+        sys.exit("Parquet export requires pyarrow (pip install pyarrow).")
+
+    try:
+        rows = fact_rows.export_fact_rows(
+            args.output, fmt, args.years, args.models, args.regions,
+            chunk_size=args.chunk_size, db_path=db_path,
+        )
+    except sqlite3.Error as e:
+        sys.exit(f"Cannot read {db_path}: {e}")
+    print(f"Exported {rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
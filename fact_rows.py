@@ -0,0 +1,100 @@
+import csv
+import importlib.util
+import os
+import sqlite3
+
+# Fact rows are exported straight from a SQLite cursor in fixed-size chunks,
+# so memory stays flat no matter how many rows match. This module has no
+# Streamlit dependency so the export CLI can use it on its own.
+
+DB_PATH = os.environ.get("EV_DB_PATH", "ev_data.db")
+
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_FORMATS = ["csv", "parquet"]
+EXPORT_COLUMNS = [
+    "year", "month_name", "region_name", "model_name",
+    "estimated_deliveries", "production_units", "avg_price_usd",
+    "battery_capacity_kwh", "range_km", "co2_saved_tons", "charging_stations",
+]
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def fact_rows_query(years=None, models=None, regions=None):
+    conditions, params = [], []
+    for column, values in (("d.year", years), ("m.model_name", models), ("r.region_name", regions)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+    query = """
+    SELECT
+        d.year,
+        d.month_name,
+        r.region_name,
+        m.model_name,
+        f.estimated_deliveries,
+        f.production_units,
+        f.avg_price_usd,
+        f.battery_capacity_kwh,
+        f.range_km,
+        f.co2_saved_tons,
+        f.charging_stations
+    FROM EVMetrics f
+    JOIN Date d ON f.date_id = d.date_id
+    JOIN Model m ON f.model_id = m.model_id
+    JOIN Region r ON f.region_id = r.region_id
+    """
+    if conditions:
+        query += "WHERE " + " AND ".join(conditions) + "\n"
+    return query + "ORDER BY f.metric_id", params
+
+
+def iter_fact_rows(years=None, models=None, regions=None, chunk_size=EXPORT_CHUNK_ROWS, db_path=None):
+    # Yields lists of up to chunk_size rows. The connection is read-only so
+    # an export never holds a write lock against the loader or other sessions.
+    query, params = fact_rows_query(years, models, regions)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path or DB_PATH)}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def export_fact_rows(path, fmt, years=None, models=None, regions=None, chunk_size=EXPORT_CHUNK_ROWS, db_path=None):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    chunks = iter_fact_rows(years, models, regions, chunk_size, db_path)
+    total = 0
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in chunks:
+                writer.writerows(rows)
+                total += len(rows)
+        return total
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"month_name": pa.string(), "region_name": pa.string(), "model_name": pa.string(),
+             "avg_price_usd": pa.float64(), "co2_saved_tons": pa.float64()}
+    schema = pa.schema([(name, types.get(name, pa.int64())) for name in EXPORT_COLUMNS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            total += len(rows)
+    return total
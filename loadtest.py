@@ -0,0 +1,178 @@
+import argparse
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import Database
+
+# Drives dashboard.py headlessly with Streamlit's AppTest to measure how rerun
+# latency holds up when many sessions share one process (and one cache).
+#
+#   python loadtest.py --sessions 8 --reruns 25 --rows 1000000
+
+YEAR_OPTIONS = [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024, 2025]
+MODEL_OPTIONS = ["Model S", "Model 3", "Model X", "Model Y", "Cybertruck"]
+REGION_OPTIONS = ["North America", "Europe", "Asia", "Middle East"]
+
+FILTERS = {
+    "Select Year(s):": YEAR_OPTIONS,
+    "Select Model(s):": MODEL_OPTIONS,
+    "Select Region(s):": REGION_OPTIONS,
+}
+
+TAB_COUNT = 5
+
+
+def build_database(source, target, rows):
+    shutil.copyfile(source, target)
+    conn = sqlite3.connect(target)
+    cursor = conn.cursor()
+    count = cursor.execute("SELECT COUNT(*) FROM EVMetrics").fetchone()[0]
+
+    # Grow the fact table by re-inserting existing rows with the measures
+    # jittered by up to +/-10%, doubling until the target size is reached.
+    while count < rows:
+        cursor.execute("""
+            INSERT INTO EVMetrics (
+                date_id, region_id, model_id,
+                estimated_deliveries, production_units,
+                avg_price_usd, battery_capacity_kwh, range_km,
+                co2_saved_tons, charging_stations
+            )
+            SELECT
+                date_id, region_id, model_id,
+                CAST(estimated_deliveries * (0.9 + (ABS(RANDOM()) % 200) / 1000.0) AS INTEGER),
+                CAST(production_units * (0.9 + (ABS(RANDOM()) % 200) / 1000.0) AS INTEGER),
+                avg_price_usd, battery_capacity_kwh, range_km,
+                co2_saved_tons, charging_stations
+            FROM EVMetrics
+            LIMIT ?
+        """, (rows - count,))
+        count = cursor.execute("SELECT COUNT(*) FROM EVMetrics").fetchone()[0]
+    conn.commit()
+
+    # Resample so the stratum sizes match the grown fact table.
+    Database.build_sample_tables(cursor)
+    conn.close()
+    return count
+
+
+def find_multiselect(at, label):
+    widget = next((w for w in at.multiselect if w.label == label), None)
+    if widget is None:
+        raise LookupError(f"no multiselect labelled {label!r} was rendered")
+    return widget
+
+
+def timed_run(at, latencies, errors):
+    start = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - start)
+    if at.exception:
+        errors.append(at.exception[0].message)
+
+
+def run_session(session_id, reruns, timeout, seed, latencies, errors):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file("dashboard.py", default_timeout=timeout)
+
+    timed_run(at, latencies, errors)
+
+    for _ in range(reruns):
+        label = rng.choice(list(FILTERS))
+        options = FILTERS[label]
+        find_multiselect(at, label).set_value(rng.sample(options, rng.randint(1, len(options))))
+
+        timed_run(at, latencies, errors)
+
+        # Tabs switch client-side in Streamlit and never trigger a rerun, so a
+        # "tab switch" here just reads back what the chosen tab rendered.
+        tab = at.tabs[rng.randrange(TAB_COUNT)]
+        if not tab.children:
+            errors.append(f"session {session_id}: tab '{tab.label}' rendered nothing")
+
+
+def run_session_safely(session_id, reruns, timeout, seed, latencies, errors):
+    # A failing session is reported with the rest of the errors instead of
+    # aborting the whole run.
+    try:
+        run_session(session_id, reruns, timeout, seed, latencies, errors)
+    except Exception as e:
+        errors.append(f"session {session_id} aborted: {type(e).__name__}: {e}")
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for dashboard.py")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent sessions to simulate")
+    parser.add_argument("--reruns", type=int, default=20, help="filter changes per session")
+    parser.add_argument("--rows", type=int, default=0, help="grow a copy of the database to this many fact rows")
+    parser.add_argument("--db", default="ev_data.db", help="source database")
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ev_loadtest_")
+    try:
+        if args.rows:
+            db_path = os.path.join(workdir, "ev_data.db")
+            fact_rows = build_database(args.db, db_path, args.rows)
+        else:
+            db_path = os.path.abspath(args.db)
+            with sqlite3.connect(db_path) as conn:
+                fact_rows = conn.execute("SELECT COUNT(*) FROM EVMetrics").fetchone()[0]
+
+        # Must be set before queries.py is first imported.
+        os.environ["EV_DB_PATH"] = db_path
+        import queries
+
+        # list.append is atomic, so sessions can share these directly.
+        latencies = []
+        errors = []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            futures = [
+                pool.submit(run_session_safely, i, args.reruns, args.timeout, args.seed, latencies, errors)
+                for i in range(args.sessions)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        stats = queries.query_stats()
+        hit_ratio = 1 - stats["misses"] / stats["calls"] if stats["calls"] else 0.0
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        print(f"Database:        {db_path} ({fact_rows:,} fact rows)")
+        print(f"Sessions:        {args.sessions} x {args.reruns} reruns")
+        print(f"Reruns:          {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed if elapsed else 0:.2f} reruns/s)")
+        if len(latencies) >= 2:
+            print(f"Latency p50:     {percentile(latencies, 50) * 1000:.0f} ms")
+            print(f"Latency p95:     {percentile(latencies, 95) * 1000:.0f} ms")
+            print(f"Latency p99:     {percentile(latencies, 99) * 1000:.0f} ms")
+        else:
+            print("Latency:         not enough reruns for percentiles (need at least 2)")
+        print(f"Peak RSS:        {peak_rss_mb:,.1f} MB")
+        print(f"Cache hit ratio: {hit_ratio:.1%} ({stats['calls'] - stats['misses']}/{stats['calls']})")
+        if errors:
+            print(f"Errors:          {len(errors)}")
+            for error in errors[:10]:
+                print(f"  {error}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+DB_PATH = os.environ.get("EV_DB_PATH", "ev_data.db")
+
+# pandas and numpy are imported where they are used so that importing this
+# module stays cheap and the page can paint before they load.
+
+# Set EV_ARROW_DTYPES=1 to keep numeric result columns Arrow-backed
+# (requires pyarrow). Dimension columns are always categorical.
+USE_ARROW = os.environ.get("EV_ARROW_DTYPES", "0") == "1"
+
+DIMENSION_COLUMNS = ["region_name", "model_name", "month_name"]
+
+# Upper bound on the memory held by cached query results. Once it is
+# exceeded the least recently used results are evicted from the cache.
+QUERY_CACHE_BYTES = int(float(os.environ.get("EV_QUERY_CACHE_MB", "256")) * 1024 ** 2)
+
+# Bytes held by each cached result, keyed by query text, in least to most
+# recently used order.
+_result_bytes = {}
+_cache_lock = threading.Lock()
+
+# Calls to run_query and how many of them missed the cache.
+_query_stats = {"calls": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# Stratified sample maintained by Database.py for approximate mode.
+SAMPLE_TABLE = "EVMetricsSample"
+Z_95 = 1.96
+
+# Exact queries being computed in the background while approximate results
+# are on screen, and those that have finished. The worker pool is created on
+# first use so importing this module starts no threads.
+_refine_executor = None
+_refining = {}
+_refined = set()
+_refine_lock = threading.RLock()
+
+
+def compact_frame(df):
+    import numpy as np
+    import pandas as pd
+
+    for col in df.columns:
+        if col in DIMENSION_COLUMNS:
+            # Categories only pay off when values repeat; on small aggregate
+            # frames they would just add overhead.
+            if df[col].nunique() * 2 <= len(df):
+                df[col] = df[col].astype("category")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            # Only narrow floats when no precision is lost (e.g. whole numbers
+            # coming back as float because of NULLs), so prices keep their cents.
+            narrowed = df[col].astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(np.float64), df[col].to_numpy(), equal_nan=True):
+                df[col] = narrowed
+
+    if USE_ARROW:
+        import pyarrow as pa
+        for col in df.columns:
+            if col not in DIMENSION_COLUMNS:
+                df[col] = df[col].astype(pd.ArrowDtype(pa.from_numpy_dtype(df[col].dtype)))
+    return df
+
+
+@st.cache_data
+def _cached_query(query):
+    import pandas as pd
+
+    with _stats_lock:
+        _query_stats["misses"] += 1
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        df = pd.read_sql_query(query, conn)
+        conn.close()
+        df = compact_frame(df)
+        with _cache_lock:
+            _result_bytes[query] = int(df.memory_usage(deep=True).sum())
+        return df
+    except Exception as e:
+        st.error(f"Database error: {e}")
+        return None
+
+
+def run_query(query):
+    with _stats_lock:
+        _query_stats["calls"] += 1
+    df = _cached_query(query)
+    _enforce_cache_budget(query)
+    return df
+
+
+def _enforce_cache_budget(query):
+    with _cache_lock:
+        if query in _result_bytes:
+            _result_bytes[query] = _result_bytes.pop(query)
+        evicted = []
+        while sum(_result_bytes.values()) > QUERY_CACHE_BYTES and len(_result_bytes) > 1:
+            oldest = next(iter(_result_bytes))
+            del _result_bytes[oldest]
+            evicted.append(oldest)
+    for oldest in evicted:
+        _cached_query.clear(oldest)
+
+
+def cache_memory():
+    with _cache_lock:
+        return len(_result_bytes), sum(_result_bytes.values())
+
+
+def query_stats():
+    with _stats_lock:
+        return dict(_query_stats)
+
+
+def clear_cache():
+    _cached_query.clear()
+    with _cache_lock:
+        _result_bytes.clear()
+    with _refine_lock:
+        _refined.clear()
+
+
+@st.cache_data(ttl=60)
+def has_sample():
+    conn = sqlite3.connect(DB_PATH)
+    found = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (SAMPLE_TABLE,)
+    ).fetchone()
+    conn.close()
+    return found is not None
+
+
+@st.cache_data
+def approximate_query(measures, group_by, where):
+    # measures: (name, "sum" | "avg", sql_expression) tuples. Returns one row
+    # per group with each measure's estimate and its 95% CI half-width in
+    # "<name>_ci", using the stratified estimator over year x region x model.
+    import numpy as np
+    import pandas as pd
+
+    keys = [g.split(".")[-1] for g in group_by] or ["_all"]
+    select = list(group_by) or ["0 AS _all"]
+    select += [
+        "f.stratum_size", "f.sample_size", "COUNT(*) AS row_count",
+    ]
+    for name, _, expr in measures:
+        select += [f"SUM({expr}) AS {name}_sum", f"SUM(({expr}) * ({expr})) AS {name}_sq"]
+
+    query = f"""
+    SELECT {", ".join(select)}
+    FROM {SAMPLE_TABLE} f
+    JOIN Date d ON f.date_id = d.date_id
+    JOIN Model m ON f.model_id = m.model_id
+    JOIN Region r ON f.region_id = r.region_id
+    WHERE {where}
+    GROUP BY {", ".join(list(group_by) + ["f.year", "f.region_id", "f.model_id"])}
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        strata = pd.read_sql_query(query, conn)
+        conn.close()
+    except Exception as e:
+        st.error(f"Database error: {e}")
+        return None
+
+    big_n = strata["stratum_size"].astype(float)
+    n = strata["sample_size"].astype(float)
+    weight = big_n / n
+    # Per-stratum variance multiplier N^2 (1 - n/N) / (n (n - 1)), to be
+    # applied to the within-stratum sum of squared deviations.
+    var_factor = (big_n ** 2 * (1 - n / big_n) / (n * (n - 1))).where(n > 1, 0.0)
+
+    strata["rows_est"] = weight * strata["row_count"]
+    for name, _, _ in measures:
+        strata[f"{name}_total"] = weight * strata[f"{name}_sum"]
+    totals = strata.groupby(keys)[
+        ["rows_est"] + [f"{name}_total" for name, _, _ in measures]
+    ].transform("sum")
+
+    out_cols = []
+    for name, kind, _ in measures:
+        y_sum, y_sq = strata[f"{name}_sum"], strata[f"{name}_sq"]
+        if kind == "sum":
+            strata[name] = strata[f"{name}_total"]
+            strata[f"{name}_var"] = var_factor * (y_sq - y_sum ** 2 / n)
+        else:
+            # Ratio estimator: linearise around the group mean.
+            ratio = totals[f"{name}_total"] / totals["rows_est"]
+            z_sum = y_sum - ratio * strata["row_count"]
+            z_sq = y_sq - 2 * ratio * y_sum + ratio ** 2 * strata["row_count"]
+            strata[name] = strata[f"{name}_total"] / totals["rows_est"]
+            strata[f"{name}_var"] = var_factor * (z_sq - z_sum ** 2 / n) / totals["rows_est"] ** 2
+        out_cols += [name, f"{name}_var"]
+
+    result = strata.groupby(keys, sort=False)[out_cols].sum().reset_index()
+    for name, _, _ in measures:
+        result[f"{name}_ci"] = Z_95 * np.sqrt(result.pop(f"{name}_var").clip(lower=0))
+    if group_by:
+        return result
+    return result.drop(columns="_all")
+
+
+def _finish_refinement(query):
+    with _refine_lock:
+        _refining.pop(query, None)
+        _refined.add(query)
+
+
+def _refiner():
+    global _refine_executor
+    with _refine_lock:
+        if _refine_executor is None:
+            _refine_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="refine")
+        return _refine_executor
+
+
+def refine_in_background(query):
+    # Returns the exact result once it has been computed; until then the
+    # query runs on a worker thread and None is returned.
+    with _refine_lock:
+        if query in _refined:
+            done = True
+        else:
+            done = False
+            if query not in _refining:
+                future = _refiner().submit(run_query, query)
+                _refining[query] = future
+                future.add_done_callback(lambda _: _finish_refinement(query))
+    if done:
+        return run_query(query)
+    return None
+
+
+def refinements_done(queries):
+    with _refine_lock:
+        return _refined.issuperset(queries)
+
@@ -0,0 +1,122 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+# Profiles what dashboard.py imports before its first paint with
+# `python -X importtime` and fails when the startup budget is exceeded or a
+# heavy dependency creeps back onto the startup path.
+#
+#   python startup_profile.py --budget-ms 1000
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD = os.path.join(HERE, "dashboard.py")
+
+# Imported alongside the dashboard's startup modules: the loader must stay
+# cheap and side-effect free to import as well.
+EXTRA_MODULES = ["Database"]
+
+# Only needed once data is on screen; must not load before the first paint.
+DEFERRED_MODULES = ["pandas", "numpy", "plotly.express"]
+
+# Import time only, not spawn to first paint. Measured at roughly 400-550 ms
+# on a developer machine, so the budget leaves about 2x headroom.
+DEFAULT_BUDGET_MS = 1000
+
+
+def startup_imports(path=DASHBOARD):
+    # Modules dashboard.py imports at the top level before its first st.*
+    # call that renders something (st.set_page_config does not).
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+        elif _renders(node):
+            break
+    return modules
+
+
+def _renders(node):
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+        return False
+    for call in ast.walk(node):
+        if not isinstance(call, ast.Call):
+            continue
+        func = call.func
+        while isinstance(func, ast.Attribute):
+            if isinstance(func.value, ast.Name) and func.value.id == "st":
+                return func.attr != "set_page_config"
+            func = func.value
+    return False
+
+
+def profile(modules):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=HERE,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def total_ms(rows):
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+
+def deferred_imports(rows):
+    imported = {name for name, _, _, _ in rows}
+    return [module for module in DEFERRED_MODULES if module in imported]
+
+
+def startup_modules(path=DASHBOARD):
+    return list(dict.fromkeys(startup_imports(path) + EXTRA_MODULES))
+
+
+def fastest_profile(runs=3, path=DASHBOARD):
+    modules = startup_modules(path)
+    return min((profile(modules) for _ in range(runs)), key=total_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile and startup budget for dashboard.py")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="maximum total import time")
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of this many runs")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    args = parser.parse_args()
+
+    rows = fastest_profile(args.runs)
+    total = total_ms(rows)
+
+    print(f"Startup modules: {', '.join(startup_modules())}\n")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+    print(f"\nTotal startup imports: {total:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = [f"{module} is imported before the first paint" for module in deferred_imports(rows)]
+    if total > args.budget_ms:
+        failures.append(f"startup imports took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import startup_profile
+
+
+def test_dashboard_defers_heavy_imports_until_first_paint():
+    rows = startup_profile.fastest_profile(runs=1)
+    assert startup_profile.deferred_imports(rows) == []
+
+
+# Wall-clock timing is noisy on shared machines, so the budget check only runs
+# when asked for: EV_STARTUP_BUDGET=1 python -m pytest -q
+@pytest.mark.skipif(os.environ.get("EV_STARTUP_BUDGET") != "1", reason="set EV_STARTUP_BUDGET=1 to check the startup budget")
+def test_startup_imports_within_budget():
+    rows = startup_profile.fastest_profile(runs=3)
+    assert startup_profile.total_ms(rows) <= startup_profile.DEFAULT_BUDGET_MS
+
+
+def test_imports_after_first_paint_are_not_startup_imports(tmp_path):
+    app = tmp_path / "app.py"
+    app.write_text(
+        "import streamlit as st\n"
+        "st.set_page_config(layout='wide')\n"
+        "import charts\n"
+        "st.title('Dashboard')\n"
+        "import pandas as pd\n"
+    )
+    assert startup_profile.startup_imports(app) == ["streamlit", "charts"]
+
+
+def test_heavy_import_before_first_paint_is_caught(tmp_path):
+    app = tmp_path / "app.py"
+    app.write_text(
+        "import streamlit as st\n"
+        "import plotly.express as px\n"
+        "st.title('Dashboard')\n"
+    )
+    rows = startup_profile.fastest_profile(runs=1, path=app)
+    assert startup_profile.deferred_imports(rows) == ["plotly.express"]